@@ -1,9 +1,13 @@
 import streamlit as st
 import pandas as pd
+import asyncio
+import io
+import itertools
 import re
-import json
+import orjson
+import threading
+import time
 from datetime import datetime
-import uuid
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -14,33 +18,94 @@ import anthropic
 
 
 API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
+MODEL = "claude-sonnet-4-20250514"
+PROMPT_CACHING_BETA = "prompt-caching-2024-07-31"
+MIN_CACHEABLE_CHARS = 4 * 1024  # Sonnet only caches prefixes of 1024+ tokens (~4 chars each)
+CHUNK_SIZE = 5  # Items per concurrent API call
+MAX_CONCURRENT_REQUESTS = 8
+CHUNK_ATTEMPTS = 2  # A failed chunk is retried on its own
 DATA_DIR = Path("data")
 DATA_DIR.mkdir(exist_ok=True)
 
-PROPERTIES_FILE = DATA_DIR / "properties.csv"
-PROPOSITIONS_FILE = DATA_DIR / "propositions.csv"
-LTL_FILE = DATA_DIR / "ltl_formulas.csv"
+# Each table is a directory of Parquet part files; new rows are written as a
+# new part and edits compact the table back into a single part
+PROPERTIES_TABLE = DATA_DIR / "properties"
+PROPOSITIONS_TABLE = DATA_DIR / "propositions"
+LTL_TABLE = DATA_DIR / "ltl_formulas"
 COMPLETE_FILE = DATA_DIR / "complete_formalization.csv"
 
+PROPERTIES_PER_PAGE = 10  # Proposition editors rendered at once in Step 3
+_STATUS = ("⏳ Pending", "✅ Approved")  # Indexed by the approved flag
+_RATIOS = (3, 2)  # Sample panel's text and metrics column widths
+_SAMPLE_FIELDS = ('natural_language', 'atomic_propositions', 'ltl_formula', 'ltl_explanation',
+                  'rfc_number', 'section', 'property_type', 'ltl_operators', 'approved')
+
+_RFC_NUM_RE = re.compile(r'RFC\s*(\d+)', re.IGNORECASE)
+_SECTION_RE = re.compile(rb'^(\d+(?:\.\d+)*\.?)\s+(.+?)$')
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+# First line of more than 15 non-blank chars that doesn't start with "RFC"
+_TITLE_RE = re.compile(r'^[ \t\r\f\v]*(?!RFC)(\S[^\n]{14,}\S)[ \t\r\f\v]*$', re.MULTILINE)
+# RFC 2119 keywords as whole words; each "NOT" form is counted once through its prefix
+_KW_BYTES = (b'MUST', b'SHALL', b'SHOULD', b'REQUIRED', b'RECOMMENDED', b'MAY', b'OPTIONAL')
+_KW_RE = re.compile(rb'\b(?:' + b'|'.join(_KW_BYTES) + rb')\b')
+_LTL_TOKEN_RE = re.compile(r'<->|->|[()!&|]|\w+|\S')
+# Binding strength of each LTL operator; unary ones bind tightest
+_LTL_PRECEDENCE = {'!': 5, 'G': 5, 'F': 5, 'X': 5, 'U': 4, 'R': 4, 'W': 4, '&': 3, '|': 2, '->': 1, '<->': 0}
+_LTL_UNARY = frozenset('!GFX')
+_LTL_LEFT_ASSOC = frozenset('&|')
+
+@st.cache_resource
+def _saved_ids_by_table():
+    """Per-table sets of persisted ids, kept across reruns"""
+    return {}
+
+@st.cache_resource
+def _get_event_loop():
+    """Event loop on a daemon thread that runs every Claude request"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+@st.cache_resource
+def _get_anthropic_client(api_key):
+    """Client shared by all phases, reruns and sessions so its connections stay alive"""
+    # Its connection pool is only ever used from _get_event_loop()
+    return anthropic.AsyncAnthropic(api_key=api_key)
+
+@st.cache_data(ttl=None, max_entries=9, show_spinner=False)  # A few versions of each table
+def _load_parts(part_paths):
+    """Read a table's Parquet parts, cached across reruns"""
+    # Every write creates a uniquely named part, so a save changes the key
+    return pd.concat([pd.read_parquet(part) for part in part_paths], ignore_index=True)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _sample_or_none(complete_df, row):
+    """Formalization at row as a plain dict for the sample view, or None if there is none"""
+    if complete_df.empty:
+        return None
+    
+    # Only the fields render_sample shows, read by position from one row array
+    values = complete_df.iloc[min(row, len(complete_df) - 1)].to_numpy()
+    positions = complete_df.columns.get_indexer(_SAMPLE_FIELDS)
+    return {name: values[i] for name, i in zip(_SAMPLE_FIELDS, positions)}
+
 class SmartRFCParser:
     """Intelligently parse RFC and extract property-rich content"""
     
-    RFC_KEYWORDS = ['MUST', 'MUST NOT', 'REQUIRED', 'SHALL', 'SHALL NOT',
-                    'SHOULD', 'SHOULD NOT', 'RECOMMENDED', 'MAY', 'OPTIONAL']
+    MAX_CONTENT_CHARS = 2000  # Limit each section
     
     def parse(self, text):
         """Parse RFC and extract metadata + property-rich sections"""
         
         # Extract RFC number
-        rfc_match = re.search(r'RFC\s*(\d+)', text, re.IGNORECASE)
+        rfc_match = _RFC_NUM_RE.search(text)
         rfc_number = rfc_match.group(1) if rfc_match else "Unknown"
         
-        # Extract title (usually in first 20 lines)
-        lines = text.split('\n')
-        title = self._extract_title(lines[:20])
+        # Extract title (usually in the header block)
+        title = self._extract_title(text)
         
         # Find all sections with RFC keywords
-        sections = self._extract_property_sections(text)
+        sections = self._extract_property_sections(text.encode('utf-8'))
         
         return {
             'rfc_number': rfc_number,
@@ -49,91 +114,79 @@ class SmartRFCParser:
             'property_sections': sections
         }
     
-    def _extract_title(self, lines):
-        for line in lines:
-            stripped = line.strip()
-            if len(stripped) > 15 and not stripped.startswith('RFC'):
-                return stripped[:100]
-        return "Unknown Title"
+    def _extract_title(self, text):
+        match = _TITLE_RE.search(text, 0, 4000)
+        return match.group(1)[:100] if match else "Unknown Title"
     
-    def _extract_property_sections(self, text):
-        """Extract sections that contain properties"""
+    def _extract_property_sections(self, data):
+        """Extract sections that contain properties from the UTF-8 encoded RFC"""
         
         sections = []
         
-        # Split by section numbers
-        section_pattern = r'^(\d+(?:\.\d+)*\.?)\s+(.+?)$'
-        lines = text.split('\n')
-        
+        # Split by section numbers, tracking each section as a (start, end)
+        # byte range so content is only decoded for sections that are kept
         current_section = None
         current_title = ""
-        current_content = []
+        start = offset = 0
         
-        for line in lines:
-            match = re.match(section_pattern, line.strip())
+        for line in io.BytesIO(data):
+            match = _SECTION_RE.match(line.strip())
             
             if match:
                 # Save previous section if it has keywords
-                if current_section and current_content:
-                    content = '\n'.join(current_content)
-                    keyword_count = self._count_keywords(content)
-                    
-                    if keyword_count >= 3:  # At least 3 keywords = likely has properties
-                        sections.append({
-                            'section': current_section,
-                            'title': current_title,
-                            'content': content,
-                            'keywords': keyword_count
-                        })
+                if current_section and offset > start:
+                    self._add_if_property_rich(sections, current_section, current_title, data, start, offset)
                 
                 # Start new section
-                current_section = match.group(1).rstrip('.')
-                current_title = match.group(2).strip()
-                current_content = []
+                current_section = match.group(1).rstrip(b'.').decode()
+                current_title = match.group(2).strip().decode('utf-8', errors='ignore')
+                start = offset + len(line)
             
-            elif current_section:
-                current_content.append(line)
+            offset += len(line)
         
         # Save last section
-        if current_section and current_content:
-            content = '\n'.join(current_content)
-            keyword_count = self._count_keywords(content)
-            if keyword_count >= 3:
-                sections.append({
-                    'section': current_section,
-                    'title': current_title,
-                    'content': content,
-                    'keywords': keyword_count
-                })
+        if current_section and offset > start:
+            self._add_if_property_rich(sections, current_section, current_title, data, start, offset)
         
         # Sort by keyword density
         sections.sort(key=lambda x: x['keywords'], reverse=True)
         
         return sections
     
-    def _count_keywords(self, text):
-        count = 0
-        upper = text.upper()
-        for kw in self.RFC_KEYWORDS:
-            count += upper.count(kw)
-        return count
+    def _add_if_property_rich(self, sections, section, title, data, start, end):
+        # At least 3 keywords = likely has properties; the exact count used
+        # for sorting is only computed for sections that pass
+        if self._has_enough_keywords(data, start, end, threshold=3):
+            sections.append({
+                'section': section,
+                'title': title,
+                # Truncated once here; a UTF-8 char is at most 4 bytes
+                'content': data[start:min(end, start + 4 * self.MAX_CONTENT_CHARS)].decode(
+                    'utf-8', errors='ignore')[:self.MAX_CONTENT_CHARS],
+                'keywords': self._count_keywords(data, start, end)
+            })
+    
+    def _has_enough_keywords(self, text_bytes, start, end, threshold=3):
+        """Stop scanning as soon as threshold keywords have been seen"""
+        matches = _KW_RE.finditer(text_bytes, start, end)
+        return next(itertools.islice(matches, threshold - 1, None), None) is not None
+    
+    def _count_keywords(self, text_bytes, start=0, end=None):
+        if end is None:
+            end = len(text_bytes)
+        return sum(1 for _ in _KW_RE.finditer(text_bytes, start, end))
+
+@st.cache_resource
+def _get_rfc_parser():
+    """Stateless parser shared by reference across reruns and sessions"""
+    return SmartRFCParser()
 
 class PropertyProcessor:
     """Process properties using Claude efficiently"""
     
-    def __init__(self, api_key):
-        self.client = anthropic.Anthropic(api_key=api_key)
-    
-    def extract_properties_batch(self, sections, rfc_number):
-        """Extract properties from ALL sections in ONE call"""
-        
-        # Prepare combined prompt
-        sections_text = ""
-        for i, sec in enumerate(sections, 1):
-            sections_text += f"\n\n=== SECTION {sec['section']}: {sec['title']} ===\n"
-            sections_text += sec['content'][:2000]  # Limit each section
-        
-        prompt = f"""Analyze RFC {rfc_number} and extract ALL protocol properties.
+    # Static instructions go first so they form the shared prompt prefix; _cached_block
+    # only marks it for caching once it reaches the minimum cacheable length
+    PROPERTIES_INSTRUCTIONS = """Analyze the RFC sections below and extract ALL protocol properties.
 
 A property is a requirement/constraint with keywords like MUST, SHOULD, MAY, etc.
 
@@ -142,62 +195,14 @@ For each property found, provide:
 - text: Complete property statement
 - type: One of [Safety, Liveness, Ordering, Timing, Unknown]
 
-Here are the sections:
-{sections_text}
-
 Return JSON array ONLY:
 [
-  {{"section": "4.2", "text": "Client MUST NOT send...", "type": "Safety"}},
+  {"section": "4.2", "text": "Client MUST NOT send...", "type": "Safety"},
   ...
 ]
 """
-        
-        try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=8000,
-                temperature=0.2,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            text = response.content[0].text
-            
-            # Extract JSON
-            json_match = re.search(r'\[.*\]', text, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-                
-                # Add metadata
-                properties = []
-                for item in data:
-                    properties.append({
-                        'id': str(uuid.uuid4())[:8],
-                        'rfc': rfc_number,
-                        'section': item.get('section', ''),
-                        'text': item.get('text', ''),
-                        'type': item.get('type', 'Unknown'),
-                        'timestamp': datetime.now().isoformat()
-                    })
-                
-                return properties
-            
-            return []
-        
-        except Exception as e:
-            st.error(f"API Error: {e}")
-            return []
     
-    def extract_propositions_batch(self, properties):
-        """Extract atomic propositions for multiple properties in ONE call"""
-        
-        # Prepare batch prompt
-        properties_text = ""
-        for i, prop in enumerate(properties, 1):
-            properties_text += f"\n\n[PROPERTY {i}]\n"
-            properties_text += f"ID: {prop['id']}\n"
-            properties_text += f"Text: {prop['text']}\n"
-        
-        prompt = f"""Extract atomic propositions from these properties.
+    PROPOSITIONS_INSTRUCTIONS = """Extract atomic propositions from the properties below.
 
 An atomic proposition is a basic boolean statement (action, state, event, condition).
 
@@ -207,69 +212,14 @@ For each property, list its propositions with:
 - type: One of [action, state, event, condition]
 - description: What it represents
 
-Properties:
-{properties_text}
-
 Return JSON array ONLY:
 [
-  {{"property_id": "abc123", "name": "client_sends_data", "type": "action", "description": "Client sends data packet"}},
+  {"property_id": "abc123", "name": "client_sends_data", "type": "action", "description": "Client sends data packet"},
   ...
 ]
 """
-        
-        try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=8000,
-                temperature=0.2,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            text = response.content[0].text
-            
-            json_match = re.search(r'\[.*\]', text, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-                
-                # Add metadata
-                propositions = []
-                for item in data:
-                    propositions.append({
-                        'id': str(uuid.uuid4())[:8],
-                        'property_id': item.get('property_id', ''),
-                        'name': item.get('name', ''),
-                        'type': item.get('type', ''),
-                        'description': item.get('description', ''),
-                        'timestamp': datetime.now().isoformat(),
-                        'approved': False
-                    })
-                
-                return propositions
-            
-            return []
-        
-        except Exception as e:
-            st.error(f"API Error: {e}")
-            return []
     
-    def generate_ltl_batch(self, properties_with_propositions):
-        """Generate LTL formulas for ALL properties in ONE call"""
-        
-        # Prepare batch prompt
-        properties_text = ""
-        for i, item in enumerate(properties_with_propositions, 1):
-            prop = item['property']
-            propositions = item['propositions']
-            
-            properties_text += f"\n\n[PROPERTY {i}]\n"
-            properties_text += f"ID: {prop['id']}\n"
-            properties_text += f"Natural Language: {prop['text']}\n"
-            properties_text += f"Type: {prop['type']}\n"
-            properties_text += f"Atomic Propositions:\n"
-            for p in propositions:
-                properties_text += f"  - {p['name']}: {p['description']}\n"
-        
-        prompt = f"""Generate LTL (Linear Temporal Logic) formulas from these properties using their atomic propositions.
+    LTL_INSTRUCTIONS = """Generate LTL (Linear Temporal Logic) formulas from the properties below using their atomic propositions.
 
 LTL Operators:
 - G (Globally/Always): Something is always true
@@ -291,178 +241,474 @@ For each property, provide:
 - explanation: Brief explanation of the formula
 - operators_used: List of LTL operators used
 
-Properties:
-{properties_text}
-
 Return JSON array ONLY:
 [
-  {{
+  {
     "property_id": "abc123",
     "ltl_formula": "G (client_sends_data -> handshake_complete)",
     "explanation": "Globally: if client sends data, handshake must be complete",
     "operators_used": ["G", "->"]
-  }},
+  },
   ...
 ]
 """
-        
-        try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=8000,
+    
+    def __init__(self, api_key):
+        self.client = _get_anthropic_client(api_key)
+        self.cache_stats = {'cache_read_input_tokens': 0, 'cache_creation_input_tokens': 0}
+    
+    @staticmethod
+    def _new_ids(count):
+        """8-char hex ids drawn from a single os.urandom call"""
+        raw = os.urandom(4 * count).hex()
+        return [raw[i:i + 8] for i in range(0, len(raw), 8)]
+    
+    @staticmethod
+    def _cached_block(text):
+        """Text block, marked as a cache breakpoint only if it is long enough to be cached"""
+        block = {"type": "text", "text": text}
+        if len(text) >= MIN_CACHEABLE_CHARS:
+            block["cache_control"] = {"type": "ephemeral"}
+        return block
+    
+    async def _create(self, client, semaphore, content, max_tokens):
+        """Send one message and record prompt cache usage"""
+        async with semaphore:
+            response = await client.messages.create(
+                model=MODEL,
+                max_tokens=max_tokens,
                 temperature=0.2,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": content}],
+                extra_headers={"anthropic-beta": PROMPT_CACHING_BETA}
+            )
+        
+        for key in self.cache_stats:
+            self.cache_stats[key] += getattr(response.usage, key, None) or 0
+        
+        if response.stop_reason == "max_tokens":
+            raise ValueError(f"Response truncated at {max_tokens} tokens")
+        
+        return response.content[0].text
+    
+    async def _request_chunk(self, client, semaphore, content, max_tokens):
+        """Request and parse one chunk, retrying only this chunk on failure"""
+        for attempt in range(CHUNK_ATTEMPTS):
+            try:
+                text = await self._create(client, semaphore, content, max_tokens)
+                
+                json_match = _JSON_ARRAY_RE.search(text)
+                return orjson.loads(json_match.group()) if json_match else []
+            
+            except (ValueError, anthropic.APIError):
+                if attempt == CHUNK_ATTEMPTS - 1:
+                    raise
+    
+    async def _gather_chunks(self, contents, max_tokens):
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        return await asyncio.gather(
+            *[self._request_chunk(self.client, semaphore, content, max_tokens) for content in contents],
+            return_exceptions=True
+        )
+    
+    def _run_chunks(self, items, build_content, max_tokens=8000):
+        """Send one request per chunk of items concurrently and merge the JSON arrays"""
+        
+        chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+        results = asyncio.run_coroutine_threadsafe(
+            self._gather_chunks([build_content(chunk) for chunk in chunks], max_tokens),
+            _get_event_loop()
+        ).result()
+        
+        data = []
+        for result in results:
+            if isinstance(result, Exception):
+                st.error(f"API Error: {result}")
+            else:
+                data.extend(result)
+        
+        return data
+    
+    def extract_properties_batch(self, sections, rfc_number):
+        """Extract properties from ALL sections with concurrent chunked calls"""
+        
+        def build_content(chunk):
+            sections_text = '\n\n'.join(
+                f"=== SECTION {sec['section']}: {sec['title']} ===\n{sec['content']}"
+                for sec in chunk
             )
             
-            text = response.content[0].text
+            return [
+                self._cached_block(self.PROPERTIES_INSTRUCTIONS),
+                {"type": "text", "text": f"RFC {rfc_number} sections:\n\n{sections_text}"}
+            ]
+        
+        data = self._run_chunks(sections, build_content)
+        
+        # Add metadata
+        now = datetime.now().isoformat()
+        properties = []
+        for item_id, item in zip(self._new_ids(len(data)), data):
+            properties.append({
+                'id': item_id,
+                'rfc': rfc_number,
+                'section': str(item.get('section', '')),
+                'text': item.get('text', ''),
+                'type': item.get('type', 'Unknown'),
+                'timestamp': now
+            })
+        
+        return properties
+    
+    def extract_propositions_batch(self, properties):
+        """Extract atomic propositions for multiple properties with concurrent chunked calls"""
+        
+        def build_content(chunk):
+            parts = []
+            for i, prop in enumerate(chunk, 1):
+                parts.append(f"\n\n[PROPERTY {i}]\n")
+                parts.append(f"ID: {prop['id']}\n")
+                parts.append(f"Text: {prop['text']}\n")
+            properties_text = ''.join(parts)
             
-            json_match = re.search(r'\[.*\]', text, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-                
-                # Add metadata
-                ltl_formulas = []
-                for item in data:
-                    ltl_formulas.append({
-                        'id': str(uuid.uuid4())[:8],
-                        'property_id': item.get('property_id', ''),
-                        'ltl_formula': item.get('ltl_formula', ''),
-                        'explanation': item.get('explanation', ''),
-                        'operators_used': ','.join(item.get('operators_used', [])),
-                        'timestamp': datetime.now().isoformat(),
-                        'approved': False
-                    })
+            return [
+                self._cached_block(self.PROPOSITIONS_INSTRUCTIONS),
+                {"type": "text", "text": f"Properties:{properties_text}"}
+            ]
+        
+        data = self._run_chunks(properties, build_content)
+        
+        # Add metadata
+        now = datetime.now().isoformat()
+        propositions = []
+        for item_id, item in zip(self._new_ids(len(data)), data):
+            propositions.append({
+                'id': item_id,
+                'property_id': item.get('property_id', ''),
+                'name': item.get('name', ''),
+                'type': item.get('type', ''),
+                'description': item.get('description', ''),
+                'timestamp': now,
+                'approved': False
+            })
+        
+        return propositions
+    
+    def generate_ltl_batch(self, properties_with_propositions):
+        """Generate LTL formulas for ALL properties with concurrent chunked calls"""
+        
+        def build_content(chunk):
+            parts = []
+            for i, item in enumerate(chunk, 1):
+                prop = item['property']
+                propositions = item['propositions']
                 
-                return ltl_formulas
+                parts.append(f"\n\n[PROPERTY {i}]\n")
+                parts.append(f"ID: {prop['id']}\n")
+                parts.append(f"Natural Language: {prop['text']}\n")
+                parts.append(f"Type: {prop['type']}\n")
+                parts.append("Atomic Propositions:\n")
+                for p in propositions:
+                    parts.append(f"  - {p['name']}: {p['description']}\n")
+            properties_text = ''.join(parts)
             
-            return []
+            return [
+                self._cached_block(self.LTL_INSTRUCTIONS),
+                {"type": "text", "text": f"Properties:{properties_text}"}
+            ]
+        
+        # Five properties fit comfortably in 2000 output tokens
+        data = self._run_chunks(properties_with_propositions, build_content, max_tokens=2000)
+        
+        # Add metadata
+        now = datetime.now().isoformat()
+        ltl_formulas = []
+        for item_id, item in zip(self._new_ids(len(data)), data):
+            ltl_formulas.append({
+                'id': item_id,
+                'property_id': item.get('property_id', ''),
+                'ltl_formula': item.get('ltl_formula', ''),
+                'explanation': item.get('explanation', ''),
+                'operators_used': ','.join(item.get('operators_used', [])),
+                'timestamp': now,
+                'approved': False
+            })
         
-        except Exception as e:
-            st.error(f"API Error: {e}")
-            return []
+        return ltl_formulas
+
+def infix_to_polish(formula):
+    """LTL formula as space-separated prefix (Polish) tokens, or '' if it doesn't parse"""
+    operands, operators = [], []
+    
+    def reduce():
+        op = operators.pop()
+        if op in _LTL_UNARY:
+            operands.append(f"{op} {operands.pop()}")
+        else:
+            right, left = operands.pop(), operands.pop()
+            operands.append(f"{op} {left} {right}")
+    
+    # Shunting-yard, building each operand's prefix string as its operator is reduced
+    try:
+        for token in _LTL_TOKEN_RE.findall(formula):
+            if token in _LTL_UNARY or token == '(':
+                operators.append(token)
+            elif token == ')':
+                while operators[-1] != '(':
+                    reduce()
+                operators.pop()
+            elif token in _LTL_PRECEDENCE:
+                precedence = _LTL_PRECEDENCE[token]
+                while operators and operators[-1] != '(' and (
+                    _LTL_PRECEDENCE[operators[-1]] > precedence
+                    or (_LTL_PRECEDENCE[operators[-1]] == precedence and token in _LTL_LEFT_ASSOC)
+                ):
+                    reduce()
+                operators.append(token)
+            elif token.isidentifier() or token.isalnum():
+                operands.append(token)
+            else:
+                return ''
+        
+        while operators:
+            if operators[-1] == '(':
+                return ''
+            reduce()
+    except IndexError:
+        return ''
+    
+    return operands[0] if len(operands) == 1 else ''
 
 class DataManager:
-    """Manage CSV data efficiently"""
+    """Manage Parquet data efficiently"""
     
     @staticmethod
-    def load_properties():
-        if PROPERTIES_FILE.exists():
-            return pd.read_csv(PROPERTIES_FILE)
-        return pd.DataFrame(columns=['id', 'rfc', 'section', 'text', 'type', 'timestamp'])
+    def _parts(table):
+        return sorted(table.glob('part-*.parquet'))
     
     @staticmethod
-    def save_properties(props):
-        df = pd.DataFrame(props)
+    def _migrate_csv(table):
+        """Convert a legacy CSV store into the table on first access"""
+        legacy_csv = table.with_suffix('.csv')
+        if not table.exists() and legacy_csv.exists():
+            # Identifier-like columns stay text so they match rows from the API
+            text_columns = {'id': str, 'property_id': str, 'rfc': str, 'section': str}
+            DataManager._write_part(table, pd.read_csv(legacy_csv, dtype=text_columns))
+    
+    @staticmethod
+    def _table_version(table):
+        """Part file names of a table; any write changes them"""
+        DataManager._migrate_csv(table)
+        return tuple(str(part) for part in DataManager._parts(table))
+    
+    @staticmethod
+    def _read_table(table, columns):
+        part_paths = DataManager._table_version(table)
+        if not part_paths:
+            return pd.DataFrame(columns=columns)
+        return _load_parts(part_paths)
+    
+    @staticmethod
+    def _write_part(table, df):
+        # Object columns may mix str and numbers (e.g. section "4.2" and 6),
+        # which pyarrow can't store in a single column
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].map(lambda v: v if isinstance(v, (str, bool)) or pd.isna(v) else str(v))
         
-        # Merge with existing
-        if PROPERTIES_FILE.exists():
-            existing = pd.read_csv(PROPERTIES_FILE)
-            df = pd.concat([existing, df], ignore_index=True)
-            df = df.drop_duplicates(subset=['id'], keep='last')
+        table.mkdir(exist_ok=True)
+        df.to_parquet(table / f"part-{time.time_ns()}.parquet", engine='pyarrow', index=False)
+    
+    @staticmethod
+    def _rewrite_table(table, df):
+        old_parts = DataManager._parts(table)
+        DataManager._write_part(table, df)
+        for part in old_parts:
+            part.unlink()
+    
+    @staticmethod
+    def _saved_ids(table):
+        """Ids already written to a table, loaded once per table"""
+        saved_ids = _saved_ids_by_table()
+        key = str(table)
+        
+        if key not in saved_ids or not table.exists():
+            saved_ids[key] = set(DataManager._read_table(table, ['id'])['id'])
+        
+        return saved_ids[key]
+    
+    @staticmethod
+    def _append_rows(table, rows):
+        """Add new rows as a new part; rewrite the table only when saved rows are edited"""
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return
+        
+        saved_ids = DataManager._saved_ids(table)
+        
+        if df['id'].isin(saved_ids).any():
+            # Merge with existing
+            existing = DataManager._read_table(table, df.columns)
+            merged = pd.concat([existing, df], ignore_index=True)
+            merged = merged.drop_duplicates(subset=['id'], keep='last')
+            DataManager._rewrite_table(table, merged)
+        else:
+            DataManager._write_part(table, df)
         
-        df.to_csv(PROPERTIES_FILE, index=False)
+        saved_ids.update(df['id'])
+    
+    @staticmethod
+    def load_properties():
+        return DataManager._read_table(PROPERTIES_TABLE, ['id', 'rfc', 'section', 'text', 'type', 'timestamp'])
+    
+    @staticmethod
+    def save_properties(props):
+        DataManager._append_rows(PROPERTIES_TABLE, props)
     
     @staticmethod
     def load_propositions():
-        if PROPOSITIONS_FILE.exists():
-            return pd.read_csv(PROPOSITIONS_FILE)
-        return pd.DataFrame(columns=['id', 'property_id', 'name', 'type', 'description', 'timestamp', 'approved'])
+        return DataManager._read_table(PROPOSITIONS_TABLE, ['id', 'property_id', 'name', 'type', 'description', 'timestamp', 'approved'])
     
     @staticmethod
     def save_propositions(props):
-        df = pd.DataFrame(props)
-        
-        if PROPOSITIONS_FILE.exists():
-            existing = pd.read_csv(PROPOSITIONS_FILE)
-            df = pd.concat([existing, df], ignore_index=True)
-            df = df.drop_duplicates(subset=['id'], keep='last')
-        
-        df.to_csv(PROPOSITIONS_FILE, index=False)
+        DataManager._append_rows(PROPOSITIONS_TABLE, props)
     
     @staticmethod
     def load_ltl_formulas():
-        if LTL_FILE.exists():
-            return pd.read_csv(LTL_FILE)
-        return pd.DataFrame(columns=['id', 'property_id', 'ltl_formula', 'explanation', 'operators_used', 'timestamp', 'approved'])
+        return DataManager._read_table(LTL_TABLE, ['id', 'property_id', 'ltl_formula', 'explanation', 'operators_used', 'timestamp', 'approved'])
     
     @staticmethod
     def save_ltl_formulas(formulas):
-        df = pd.DataFrame(formulas)
-        
-        if LTL_FILE.exists():
-            existing = pd.read_csv(LTL_FILE)
-            df = pd.concat([existing, df], ignore_index=True)
-            df = df.drop_duplicates(subset=['id'], keep='last')
-        
-        df.to_csv(LTL_FILE, index=False)
+        DataManager._append_rows(LTL_TABLE, formulas)
     
     @staticmethod
     def approve_propositions(prop_ids, approver):
         """Mark propositions as approved"""
         df = DataManager.load_propositions()
+        approved = df['id'].isin(prop_ids)
+        if not approved.any():
+            return
+        
         if 'approved_by' not in df.columns:
             df['approved_by'] = ''
-        df.loc[df['id'].isin(prop_ids), 'approved'] = True
-        df.loc[df['id'].isin(prop_ids), 'approved_by'] = approver
-        df.to_csv(PROPOSITIONS_FILE, index=False)
+        df.loc[approved, 'approved'] = True
+        df.loc[approved, 'approved_by'] = approver
+        DataManager._rewrite_table(PROPOSITIONS_TABLE, df)
     
     @staticmethod
     def approve_ltl(ltl_ids, approver):
         """Mark LTL formulas as approved"""
         df = DataManager.load_ltl_formulas()
+        approved = df['id'].isin(ltl_ids)
+        if not approved.any():
+            return
+        
         if 'approved_by' not in df.columns:
             df['approved_by'] = ''
-        df.loc[df['id'].isin(ltl_ids), 'approved'] = True
-        df.loc[df['id'].isin(ltl_ids), 'approved_by'] = approver
-        df.to_csv(LTL_FILE, index=False)
+        df.loc[approved, 'approved'] = True
+        df.loc[approved, 'approved_by'] = approver
+        DataManager._rewrite_table(LTL_TABLE, df)
     
     @staticmethod
     def generate_complete_formalization():
         """Generate complete CSV with NL, AP, LTL"""
+        table_versions = tuple(
+            DataManager._table_version(table) for table in (PROPERTIES_TABLE, PROPOSITIONS_TABLE, LTL_TABLE)
+        )
+        df = DataManager._build_complete_formalization(table_versions)
+        df.to_csv(COMPLETE_FILE, index=False)
+        return df
+    
+    @staticmethod
+    @st.cache_data(persist="disk", ttl=None, max_entries=4, show_spinner=False)
+    def _build_complete_formalization(table_versions):
+        """Join the tables; only reruns when a table changes"""
+        # Part file names are unique per write, so a persisted entry stays valid across restarts
         properties = DataManager.load_properties()
         propositions = DataManager.load_propositions()
         ltl_formulas = DataManager.load_ltl_formulas()
         
-        complete_data = []
-        
-        for _, prop in properties.iterrows():
-            prop_id = prop['id']
-            
-            # Get propositions for this property
-            prop_propositions = propositions[propositions['property_id'] == prop_id]
-            ap_list = ', '.join(prop_propositions['name'].tolist()) if not prop_propositions.empty else ''
-            
-            # Get LTL formula for this property
-            prop_ltl = ltl_formulas[ltl_formulas['property_id'] == prop_id]
-            ltl_formula = prop_ltl.iloc[0]['ltl_formula'] if not prop_ltl.empty else ''
-            ltl_explanation = prop_ltl.iloc[0]['explanation'] if not prop_ltl.empty else ''
-            ltl_operators = prop_ltl.iloc[0]['operators_used'] if not prop_ltl.empty else ''
-            ltl_approved = prop_ltl.iloc[0]['approved'] if not prop_ltl.empty else False
-            
-            complete_data.append({
-                'property_id': prop_id,
-                'rfc_number': prop['rfc'],
-                'section': prop['section'],
-                'property_type': prop['type'],
-                'natural_language': prop['text'],
-                'atomic_propositions': ap_list,
-                'ltl_formula': ltl_formula,
-                'ltl_explanation': ltl_explanation,
-                'ltl_operators': ltl_operators,
-                'approved': ltl_approved,
-                'timestamp': prop['timestamp']
-            })
+        # Propositions joined per property, and the first LTL formula per property
+        ap_by_prop = propositions.groupby('property_id')['name'].agg(', '.join)
+        ltl_first = ltl_formulas.drop_duplicates('property_id').set_index('property_id')
         
-        df = pd.DataFrame(complete_data)
-        df.to_csv(COMPLETE_FILE, index=False)
+        df = properties.merge(
+            ap_by_prop.rename('atomic_propositions'), left_on='id', right_index=True, how='left'
+        ).merge(
+            ltl_first[['ltl_formula', 'explanation', 'operators_used', 'approved']],
+            left_on='id', right_index=True, how='left'
+        )
+        
+        df = df.rename(columns={
+            'id': 'property_id',
+            'rfc': 'rfc_number',
+            'type': 'property_type',
+            'text': 'natural_language',
+            'explanation': 'ltl_explanation',
+            'operators_used': 'ltl_operators'
+        }).fillna({
+            'atomic_propositions': '',
+            'ltl_formula': '',
+            'ltl_explanation': '',
+            'ltl_operators': '',
+            'approved': False
+        })
+        
+        # Prefix form for validators and models, tokenized once per build
+        df['ltl_polish'] = df['ltl_formula'].map(infix_to_polish)
+        
+        df = df[['property_id', 'rfc_number', 'section', 'property_type', 'natural_language',
+                 'atomic_propositions', 'ltl_formula', 'ltl_polish', 'ltl_explanation', 'ltl_operators',
+                 'approved', 'timestamp']].reset_index(drop=True)
         return df
 
 
+@st.fragment
+def render_sample(sample):
+    """Sample formalization panel; holds no widgets, so it is redrawn with every full rerun"""
+    col1, col2 = st.columns(_RATIOS)
+    
+    # One markdown element for all four fields; every line of the quote needs its marker
+    quote = str(sample['natural_language']).replace('\n', '\n> ')
+    text = (
+        f"**Natural Language:**\n\n> {quote}\n\n"
+        f"**Atomic Propositions:**\n\n```\n{sample['atomic_propositions']}\n```\n\n"
+        f"**LTL Formula:**\n\n```\n{sample['ltl_formula']}\n```"
+    )
+    # Properties without a formula have no explanation to show
+    explanation = str(sample['ltl_explanation']).strip()
+    if explanation:
+        text += f"\n\n**Explanation:**\n\n{explanation}"
+    col1.markdown(text)
+    
+    metrics = [
+        ("RFC", sample['rfc_number']),
+        ("Section", sample['section']),
+        ("Type", sample['property_type']),
+        ("Operators", sample['ltl_operators']),
+        ("Status", _STATUS[bool(sample['approved'])])
+    ]
+    
+    with col2:
+        for metric_col, (label, value) in zip(st.columns(len(metrics)), metrics):
+            metric_col.metric(label, value)
+
+
+def _reset():
+    """Back to the upload stage; runs before the rerun the click triggers"""
+    st.session_state.update({
+        'stage': 'upload',
+        'rfc_data': None,
+        'properties': None,
+        'propositions': None,
+        'ltl_formulas': None
+    })
+
+
 st.set_page_config(page_title="RFC Property Extractor", layout="wide")
 
 # Initialize
 if 'parser' not in st.session_state:
-    st.session_state.parser = SmartRFCParser()
+    st.session_state.parser = _get_rfc_parser()
     if API_KEY:
         st.session_state.processor = PropertyProcessor(API_KEY)
     st.session_state.stage = 'upload'
@@ -488,6 +734,11 @@ with st.sidebar:
     st.metric("LTL Formulas", len(ltl_df))
     st.metric("Approved LTL", len(ltl_df[ltl_df['approved'] == True]) if 'approved' in ltl_df.columns and not ltl_df.empty else 0)
     
+    if 'processor' in st.session_state:
+        cache_stats = st.session_state.processor.cache_stats
+        st.metric("Cache Read Tokens", f"{cache_stats['cache_read_input_tokens']:,}")
+        st.metric("Cache Write Tokens", f"{cache_stats['cache_creation_input_tokens']:,}")
+    
     st.divider()
     
     st.subheader("📥 Export Data")
@@ -534,20 +785,22 @@ if st.session_state.stage == 'upload':
                 for sec in rfc_data['property_sections'][:5]:
                     st.write(f"**Section {sec['section']}**: {sec['title']} ({sec['keywords']} keywords)")
             
-            # Single API call to extract ALL properties
+            # Concurrent API calls to extract ALL properties
             if not API_KEY:
                 st.error("⚠️ Set ANTHROPIC_API_KEY environment variable")
             else:
-                with st.spinner("Extracting properties from all sections (1 API call)..."):
+                with st.spinner("Extracting properties from all sections (parallel API calls)..."):
                     properties = st.session_state.processor.extract_properties_batch(
                         rfc_data['property_sections'][:10],  # Top 10 sections
                         rfc_data['rfc_number']
                     )
-                    st.session_state.properties = properties
                 
                 if properties:
                     st.success(f"✅ Extracted {len(properties)} properties!")
                     
+                    # Working set is kept as a DataFrame keyed by id
+                    st.session_state.properties = pd.DataFrame(properties).set_index('id')
+                    
                     # Save immediately
                     DataManager.save_properties(properties)
                     
@@ -568,9 +821,8 @@ elif st.session_state.stage == 'review_properties':
     st.write("Review the properties below. Edit if needed, then proceed to extract propositions.")
     
     # Display in editable table
-    df = pd.DataFrame(properties)
     edited_df = st.data_editor(
-        df[['section', 'text', 'type']],
+        properties[['section', 'text', 'type']],
         num_rows="dynamic",
         use_container_width=True,
         height=400
@@ -581,24 +833,26 @@ elif st.session_state.stage == 'review_properties':
     with col1:
         if st.button("💾 Save Changes"):
             # Update properties with edits
-            for i, row in edited_df.iterrows():
-                properties[i]['text'] = row['text']
-                properties[i]['type'] = row['type']
+            edited_ids = edited_df.index.intersection(properties.index)
+            properties.loc[edited_ids, ['text', 'type']] = edited_df.loc[edited_ids, ['text', 'type']]
             
-            DataManager.save_properties(properties)
+            DataManager.save_properties(properties.reset_index())
             st.success("Saved!")
     
     with col2:
         if st.button("➡️ Extract Propositions", type="primary"):
             
-            # Single API call for ALL properties
-            with st.spinner(f"Extracting propositions for {len(properties)} properties (1 API call)..."):
-                propositions = st.session_state.processor.extract_propositions_batch(properties)
-                st.session_state.propositions = propositions
+            # Concurrent API calls for ALL properties
+            with st.spinner(f"Extracting propositions for {len(properties)} properties (parallel API calls)..."):
+                propositions = st.session_state.processor.extract_propositions_batch(
+                    properties.reset_index().to_dict('records')
+                )
             
             if propositions:
                 st.success(f"✅ Extracted {len(propositions)} propositions!")
                 
+                st.session_state.propositions = pd.DataFrame(propositions).set_index('id')
+                
                 # Save
                 DataManager.save_propositions(propositions)
                 
@@ -620,12 +874,17 @@ elif st.session_state.stage == 'approve_propositions':
     st.write(f"**{len(propositions)} propositions** extracted from **{len(properties)} properties**")
     
     # Group by property
-    for prop in properties:
-        prop_id = prop['id']
-        prop_propositions = [p for p in propositions if p['property_id'] == prop_id]
-        
-        if not prop_propositions:
-            continue
+    propositions_by_property = dict(tuple(propositions.groupby('property_id', sort=False)))
+    grouped = [prop_id for prop_id in properties.index if prop_id in propositions_by_property]
+    
+    # Only one page of editors is mounted per rerun
+    page_count = max(1, -(-len(grouped) // PROPERTIES_PER_PAGE))
+    page = st.number_input("Page", min_value=1, max_value=page_count, value=1) if page_count > 1 else 1
+    page_start = (page - 1) * PROPERTIES_PER_PAGE
+    
+    for prop_id in grouped[page_start:page_start + PROPERTIES_PER_PAGE]:
+        prop = properties.loc[prop_id]
+        prop_propositions = propositions_by_property[prop_id]
         
         with st.expander(f"**Property**: {prop['text'][:80]}... ({len(prop_propositions)} propositions)"):
             
@@ -636,9 +895,8 @@ elif st.session_state.stage == 'approve_propositions':
             st.write("**Atomic Propositions:**")
             
             # Editable propositions
-            prop_df = pd.DataFrame(prop_propositions)[['name', 'type', 'description']]
             edited_prop_df = st.data_editor(
-                prop_df,
+                prop_propositions[['name', 'type', 'description']],
                 num_rows="dynamic",
                 use_container_width=True,
                 key=f"edit_{prop_id}"
@@ -652,16 +910,15 @@ elif st.session_state.stage == 'approve_propositions':
             with col2:
                 if st.button("✅ Approve", key=f"approve_{prop_id}"):
                     # Update with edits
-                    for i, row in edited_prop_df.iterrows():
-                        prop_propositions[i]['name'] = row['name']
-                        prop_propositions[i]['type'] = row['type']
-                        prop_propositions[i]['description'] = row['description']
+                    columns = ['name', 'type', 'description']
+                    edited_ids = edited_prop_df.index.intersection(prop_propositions.index)
+                    propositions.loc[edited_ids, columns] = edited_prop_df.loc[edited_ids, columns]
                     
                     # Save updated propositions
-                    DataManager.save_propositions(prop_propositions)
+                    prop_ids = prop_propositions.index.tolist()
+                    DataManager.save_propositions(propositions.loc[prop_ids].reset_index())
                     
                     # Mark as approved
-                    prop_ids = [p['id'] for p in prop_propositions]
                     DataManager.approve_propositions(prop_ids, approver)
                     
                     st.success("✅ Approved!")
@@ -672,24 +929,22 @@ elif st.session_state.stage == 'approve_propositions':
         
         # Prepare data: properties with their approved propositions
         properties_with_propositions = []
-        propositions_df = pd.DataFrame(propositions)
-        
-        for prop in properties:
-            prop_propositions = propositions_df[propositions_df['property_id'] == prop['id']].to_dict('records')
-            if prop_propositions:
-                properties_with_propositions.append({
-                    'property': prop,
-                    'propositions': prop_propositions
-                })
-        
-        # Single API call to generate ALL LTL formulas
-        with st.spinner(f"Generating LTL formulas for {len(properties_with_propositions)} properties (1 API call)..."):
+        
+        for prop in properties.loc[grouped].reset_index().to_dict('records'):
+            properties_with_propositions.append({
+                'property': prop,
+                'propositions': propositions_by_property[prop['id']].reset_index().to_dict('records')
+            })
+        
+        # Concurrent API calls to generate ALL LTL formulas
+        with st.spinner(f"Generating LTL formulas for {len(properties_with_propositions)} properties (parallel API calls)..."):
             ltl_formulas = st.session_state.processor.generate_ltl_batch(properties_with_propositions)
-            st.session_state.ltl_formulas = ltl_formulas
         
         if ltl_formulas:
             st.success(f"✅ Generated {len(ltl_formulas)} LTL formulas!")
             
+            st.session_state.ltl_formulas = pd.DataFrame(ltl_formulas).set_index('id')
+            
             # Save
             DataManager.save_ltl_formulas(ltl_formulas)
             
@@ -712,17 +967,17 @@ elif st.session_state.stage == 'approve_ltl':
     st.write(f"**{len(ltl_formulas)} LTL formulas** generated")
     
     # Group by property
-    prop_dict = {p['id']: p for p in properties}
-    propositions_df = pd.DataFrame(propositions)
+    propositions_by_property = dict(tuple(propositions.groupby('property_id', sort=False)))
+    no_propositions = propositions.iloc[0:0]
     
-    for ltl in ltl_formulas:
+    for ltl_id, ltl in ltl_formulas.to_dict('index').items():
         prop_id = ltl['property_id']
         
-        if prop_id not in prop_dict:
+        if prop_id not in properties.index:
             continue
         
-        prop = prop_dict[prop_id]
-        prop_propositions = propositions_df[propositions_df['property_id'] == prop_id]
+        prop = properties.loc[prop_id]
+        prop_propositions = propositions_by_property.get(prop_id, no_propositions)
         
         with st.expander(f"**Property**: {prop['text'][:80]}..."):
             
@@ -733,8 +988,8 @@ elif st.session_state.stage == 'approve_ltl':
                 st.info(prop['text'])
                 
                 st.write("**Atomic Propositions:**")
-                for _, p in prop_propositions.iterrows():
-                    st.code(f"{p['name']}: {p['description']}")
+                for name, description in zip(prop_propositions['name'], prop_propositions['description']):
+                    st.code(f"{name}: {description}")
             
             with col2:
                 st.metric("Property Type", prop['type'])
@@ -748,14 +1003,14 @@ elif st.session_state.stage == 'approve_ltl':
             ltl_formula = st.text_area(
                 "LTL Formula",
                 value=ltl['ltl_formula'],
-                key=f"ltl_{ltl['id']}",
+                key=f"ltl_{ltl_id}",
                 height=100
             )
             
             explanation = st.text_area(
                 "Explanation",
                 value=ltl['explanation'],
-                key=f"exp_{ltl['id']}",
+                key=f"exp_{ltl_id}",
                 height=80
             )
             
@@ -764,22 +1019,21 @@ elif st.session_state.stage == 'approve_ltl':
             col1, col2, col3 = st.columns([2, 2, 1])
             
             with col1:
-                approver = st.text_input("Your name", value="User", key=f"approver_ltl_{ltl['id']}")
+                approver = st.text_input("Your name", value="User", key=f"approver_ltl_{ltl_id}")
             
             with col2:
-                if st.button("✅ Approve LTL", key=f"approve_ltl_{ltl['id']}", type="primary"):
+                if st.button("✅ Approve LTL", key=f"approve_ltl_{ltl_id}", type="primary"):
                     # Update LTL if edited
-                    ltl['ltl_formula'] = ltl_formula
-                    ltl['explanation'] = explanation
+                    ltl_formulas.loc[ltl_id, ['ltl_formula', 'explanation']] = [ltl_formula, explanation]
                     
                     # Save
-                    DataManager.save_ltl_formulas([ltl])
-                    DataManager.approve_ltl([ltl['id']], approver)
+                    DataManager.save_ltl_formulas(ltl_formulas.loc[[ltl_id]].reset_index())
+                    DataManager.approve_ltl([ltl_id], approver)
                     
                     st.success("✅ LTL Approved!")
             
             with col3:
-                if st.button("⏭️ Skip", key=f"skip_ltl_{ltl['id']}"):
+                if st.button("⏭️ Skip", key=f"skip_ltl_{ltl_id}"):
                     st.info("Skipped")
     
     st.divider()
@@ -846,40 +1100,18 @@ elif st.session_state.stage == 'view':
     # Show sample entries
     st.subheader("📋 Sample Formalization")
 
-    if not complete_df.empty:
-        sample = complete_df.iloc[0]
-        
-        col1, col2 = st.columns([3, 2])
-        
-        with col1:
-            st.write("**Natural Language:**")
-            st.info(sample['natural_language'])
-            
-            st.write("**Atomic Propositions:**")
-            st.code(sample['atomic_propositions'])
-            
-            st.write("**LTL Formula:**")
-            st.code(sample['ltl_formula'])
-            
-            st.write("**Explanation:**")
-            st.caption(sample['ltl_explanation'])
-        
-        with col2:
-            st.metric("RFC", sample['rfc_number'])
-            st.metric("Section", sample['section'])
-            st.metric("Type", sample['property_type'])
-            st.metric("Operators", sample['ltl_operators'])
-            st.metric("Status", "✅ Approved" if sample['approved'] else "⏳ Pending")
+    # The shown row comes from the URL (?row=N) so reloads hit the same cache entry
+    try:
+        sample_row = max(int(st.query_params.get('row', 0)), 0)
+    except ValueError:
+        sample_row = 0
+    
+    sample = _sample_or_none(complete_df, sample_row)
+    if sample is not None:
+        render_sample(sample)
 
     st.divider()
 
-    if st.button("🔄 Process Another RFC"):
-        st.session_state.stage = 'upload'
-        st.session_state.rfc_data = None
-        st.session_state.properties = None
-        st.session_state.propositions = None
-        st.session_state.ltl_formulas = None
-        st.rerun()
+    st.button("🔄 Process Another RFC", on_click=_reset)
 
-st.divider()
-st.caption("RFC Property Extractor & LTL Generator v2.0")
\ No newline at end of file
+st.markdown("---\n\n<center><small>RFC Property Extractor & LTL Generator v2.0</small></center>", unsafe_allow_html=True)
\ No newline at end of file